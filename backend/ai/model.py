@@ -4,10 +4,19 @@ from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
+import json
 import os
 import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+# Adicionar o diretório pai ao path para importar o formato de inferência da API
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.price_model import BUNDLE_FORMAT, BUNDLE_VERSION, BUNDLE_FEATURES, LinearPriceModel
+
 def generate_flight_history_csv(filename: str = "flights_history.csv", num_records: int = 10000):
     """Gera um arquivo CSV com dados históricos de voos para treinamento"""
 
@@ -91,8 +100,37 @@ def train_price_prediction_model(csv_file: str = "flights_history.csv", model_fi
     # Salvar mapeamento de códigos de aeroporto
     joblib.dump(airport_codes, "airport_codes.joblib")
 
+    # Bundle leve para a API (sem scikit-learn/pandas na inferência)
+    export_inference_bundle(model, airport_codes, os.path.splitext(model_file)[0] + ".json")
+
     return model, mse, r2
 
+def export_inference_bundle(model, airport_codes: dict, bundle_file: str = "price_predictor.json"):
+    """Exporta coeficientes, intercepto e codificação de aeroportos em JSON, validando paridade com model.predict"""
+    bundle = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "features": BUNDLE_FEATURES,
+        "coefficients": [float(c) for c in model.coef_],
+        "intercept": float(model.intercept_),
+        "airport_codes": {airport: int(code) for airport, code in airport_codes.items()},
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    # Paridade: todas as rotas conhecidas x 1..90 dias, pelo mesmo código usado na API
+    light_model = LinearPriceModel(bundle["coefficients"], bundle["intercept"], bundle["airport_codes"])
+    codes = sorted(set(bundle["airport_codes"].values()))
+    grid = np.array([(o, d, days) for o in codes for d in codes for days in range(1, 91)], dtype=np.float64)
+    expected = model.predict(pd.DataFrame(grid, columns=BUNDLE_FEATURES))
+    actual = light_model.predict_features(grid)
+    if not np.allclose(expected, actual, rtol=1e-9, atol=1e-6):
+        raise ValueError("Inference bundle does not match model.predict")
+
+    with open(bundle_file, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, indent=2)
+    print(f"Bundle de inferência salvo em {bundle_file} ({len(grid)} previsões conferidas)")
+    return bundle
+
 def load_trained_model(model_file: str = "price_predictor.joblib"):
     """Carrega um modelo treinado"""
     try:
@@ -118,6 +156,106 @@ def predict_flight_price(model, airport_codes, origin: str, destination: str, da
         print(f"Erro na previsão: {e}")
         return None
 
+# Treinamento por rota (ou por origem) em paralelo
+GLOBAL_FEATURES = ["origin_code", "destination_code", "days_ahead"]
+PARTITION_FEATURES = {
+    "route": ["days_ahead"],  # origem e destino são constantes dentro da partição
+    "origin": ["destination_code", "days_ahead"],
+}
+
+def _fit_partition(task):
+    """Treina o modelo de uma partição; função de módulo para poder ser enviada ao process pool"""
+    key, X, y = task
+    model = LinearRegression()
+    model.fit(X, y)
+    return key, model, len(y)
+
+def train_route_models(csv_file: str = "flights_history.csv", model_file: str | None = "price_predictor_routes.joblib",
+                       partition: str = "route", workers: int | None = None, min_samples: int = 30):
+    """
+    Treina um modelo por rota (partition="route") ou por origem (partition="origin") em um process pool,
+    mais um modelo global usado como fallback para partições com menos de `min_samples` registros.
+    Salva tudo em um único artefato e retorna (artefato, tempos em segundos).
+    """
+    if partition not in PARTITION_FEATURES:
+        raise ValueError(f"Partição inválida: {partition}")
+    timings = {}
+    start = time.perf_counter()
+
+    df = pd.read_csv(csv_file)
+    airports = sorted(set(df['origin']) | set(df['destination']))
+    airport_codes = {airport: i for i, airport in enumerate(airports)}
+    df['origin_code'] = df['origin'].map(airport_codes)
+    df['destination_code'] = df['destination'].map(airport_codes)
+
+    global_model = LinearRegression()
+    global_model.fit(df[GLOBAL_FEATURES].to_numpy(dtype=float), df['price'].to_numpy())
+
+    # Só arrays NumPy vão para os workers, para reduzir o custo de serialização
+    group_columns = ["origin", "destination"] if partition == "route" else ["origin"]
+    features = PARTITION_FEATURES[partition]
+    tasks = [
+        ("-".join(key), group[features].to_numpy(dtype=float), group['price'].to_numpy())
+        for key, group in df.groupby(group_columns)
+        if len(group) >= min_samples
+    ]
+    timings["prepare"] = time.perf_counter() - start
+
+    fit_start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [_fit_partition(task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fit_partition, tasks, chunksize=chunksize))
+    timings["fit"] = time.perf_counter() - fit_start
+
+    artifact = {
+        "partition": partition,
+        "features": features,
+        "global_features": GLOBAL_FEATURES,
+        "airport_codes": airport_codes,
+        "global_model": global_model,
+        "models": {key: model for key, model, _ in results},
+        "samples": {key: samples for key, _, samples in results},
+        "min_samples": min_samples,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    if model_file:
+        joblib.dump(artifact, model_file)
+    timings["total"] = time.perf_counter() - start
+    return artifact, timings
+
+def predict_with_route_models(artifact: dict, origin: str, destination: str, days_ahead: int):
+    """Previsão com o modelo da partição, ou com o modelo global se a partição não tiver modelo"""
+    airport_codes = artifact["airport_codes"]
+    origin_code = airport_codes.get(origin, 0)
+    destination_code = airport_codes.get(destination, 0)
+    key = f"{origin}-{destination}" if artifact["partition"] == "route" else origin
+
+    model = artifact["models"].get(key)
+    if model is None:
+        features = np.array([[origin_code, destination_code, days_ahead]], dtype=float)
+        return max(0, artifact["global_model"].predict(features)[0])
+    values = {"destination_code": destination_code, "days_ahead": days_ahead}
+    features = np.array([[values[name] for name in artifact["features"]]], dtype=float)
+    return max(0, model.predict(features)[0])
+
+def route_training_report(csv_file: str = "flights_history.csv", worker_counts=(1, 2, 4), partition: str = "route",
+                          min_samples: int = 30):
+    """Mede o tempo de treinamento por rota para cada quantidade de workers"""
+    print(f"{'workers':>7} | {'preparo (s)':>11} | {'fit (s)':>8} | {'total (s)':>9} | {'speedup':>7} | modelos")
+    baseline = None
+    report = []
+    for workers in worker_counts:
+        artifact, timings = train_route_models(csv_file, None, partition, workers, min_samples)
+        baseline = baseline or timings["total"]
+        print(f"{workers:>7} | {timings['prepare']:>11.2f} | {timings['fit']:>8.2f} | {timings['total']:>9.2f} | "
+              f"{baseline / timings['total']:>6.2f}x | {len(artifact['models'])}")
+        report.append({"workers": workers, **timings})
+    return report
+
 if __name__ == "__main__":
     # Exemplo de uso
     print("Gerando dados de treinamento...")
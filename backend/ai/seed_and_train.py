@@ -74,6 +74,7 @@ def main():
         print(f"   - {csv_file} (dados de treinamento)")
         print(f"   - {model_file} (modelo treinado)")
         print(f"   - airport_codes.joblib (mapeamento de aeroportos)")
+        print(f"   - {os.path.splitext(model_file)[0]}.json (bundle de inferência leve usado pela API)")
         print()
         print("💡 O backend agora pode usar o modelo para previsões em tempo real!")
 
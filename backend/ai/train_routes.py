@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Treina os modelos de previsão por rota (ou por origem) em paralelo, com um modelo global de fallback,
+e salva tudo em um único artefato. Não interativo, pensado para o retreino noturno.
+
+Uso:
+    python ai/train_routes.py --workers 8
+    python ai/train_routes.py --partition origin --report 1,2,4,8   # tempo de treino x workers
+    python ai/train_routes.py --records 2000000 --report 1,2,4,8    # gera um histórico maior antes
+"""
+
+import argparse
+import os
+import sys
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.model import generate_flight_history_csv, train_route_models, route_training_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treinamento paralelo de modelos por rota")
+    parser.add_argument("--csv", default="flights_history.csv", help="histórico de preços usado no treino")
+    parser.add_argument("--model-file", default="price_predictor_routes.joblib")
+    parser.add_argument("--partition", choices=["route", "origin"], default="route")
+    parser.add_argument("--workers", type=int, default=None, help="processos no pool (padrão: número de CPUs)")
+    parser.add_argument("--min-samples", type=int, default=30, help="mínimo de registros para treinar uma partição")
+    parser.add_argument("--records", type=int, default=None, help="gera um CSV sintético com N registros antes de treinar")
+    parser.add_argument("--report", default=None, help="lista de workers (ex: 1,2,4,8) para medir o tempo de treino")
+    args = parser.parse_args()
+
+    if args.records:
+        print(f"📊 Gerando {args.records} registros em {args.csv}...")
+        generate_flight_history_csv(args.csv, num_records=args.records)
+
+    if args.report:
+        worker_counts = [int(count) for count in args.report.split(",")]
+        print(f"⏱️  Tempo de treino por quantidade de workers ({args.partition}):")
+        route_training_report(args.csv, worker_counts, args.partition, args.min_samples)
+        return
+
+    artifact, timings = train_route_models(args.csv, args.model_file, args.partition, args.workers, args.min_samples)
+    print(f"✅ {len(artifact['models'])} modelos por {args.partition} + modelo global salvos em {args.model_file}")
+    print(f"   preparo {timings['prepare']:.2f} s | fit {timings['fit']:.2f} s | total {timings['total']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
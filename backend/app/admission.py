@@ -0,0 +1,170 @@
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from jose import JWTError, jwt
+
+from .dependencies import SECRET_KEY, ALGORITHM
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+# Número máximo de chaves (usuários/IPs) com bucket em memória
+ADMISSION_MAX_KEYS = int(os.getenv("ADMISSION_MAX_KEYS", "100000"))
+
+
+class TokenBucket:
+    """Token bucket simples: `rate` fichas por segundo, até `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, amount: float = 1.0) -> bool:
+        self._refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def retry_after(self, amount: float = 1.0) -> float:
+        """Segundos até haver fichas suficientes"""
+        self._refill()
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """Conjunto de token buckets por chave, com descarte LRU das chaves antigas"""
+
+    def __init__(self, rate: float, capacity: float, max_keys: int = ADMISSION_MAX_KEYS):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def check(self, key: str) -> Optional[float]:
+        """Consome uma ficha; retorna None se permitido ou o Retry-After em segundos"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        if bucket.consume():
+            return None
+        return bucket.retry_after()
+
+
+def _env(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+@dataclass
+class RouteClass:
+    """Limites de uma classe de rotas: taxa por cliente e concorrência global"""
+    name: str
+    prefix: str
+    rate: float  # requisições por segundo por cliente
+    burst: float
+    concurrency: int
+
+    def __post_init__(self):
+        env = f"ADMISSION_{self.name.upper()}"
+        self.rate = _env(f"{env}_RATE", self.rate)
+        self.burst = _env(f"{env}_BURST", self.burst)
+        self.concurrency = int(_env(f"{env}_CONCURRENCY", self.concurrency))
+        self.limiter = RateLimiter(self.rate, self.burst)
+        self.in_flight = 0
+
+
+def default_route_classes() -> list[RouteClass]:
+    # Rotas de autenticação são limitadas por IP (bcrypt é caro); as demais por usuário
+    return [
+        RouteClass("auth", "/auth", rate=0.2, burst=10, concurrency=8),
+        RouteClass("flights", "/flights", rate=2, burst=10, concurrency=24),
+        RouteClass("users", "/users", rate=5, burst=20, concurrency=16),
+    ]
+
+
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI de controle de admissão. Roda no event loop, antes do threadpool e do
+    banco: requisições acima do limite recebem 429/503 com Retry-After sem custo de I/O.
+    """
+
+    def __init__(self, app, route_classes: Optional[list[RouteClass]] = None, enabled: bool = ADMISSION_ENABLED):
+        self.app = app
+        self.enabled = enabled
+        self.route_classes = route_classes if route_classes is not None else default_route_classes()
+
+    def _route_class(self, path: str) -> Optional[RouteClass]:
+        for route_class in self.route_classes:
+            if path.startswith(route_class.prefix):
+                return route_class
+        return None
+
+    @staticmethod
+    def _client_key(scope, route_class: RouteClass) -> str:
+        # Usuário identificado pelo mesmo "sub" do JWT que get_current_user resolve;
+        # sem token válido (ou nas rotas de autenticação) o limite é por IP
+        if route_class.name != "auth":
+            for name, value in scope.get("headers", []):
+                if name == b"authorization":
+                    scheme, _, token = value.decode("latin-1").partition(" ")
+                    if scheme.lower() == "bearer" and token:
+                        try:
+                            subject = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+                        except JWTError:
+                            subject = None
+                        if subject:
+                            return f"user:{subject}"
+                    break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    @staticmethod
+    async def _reject(send, status_code: int, detail: str, retry_after: float):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        route_class = self._route_class(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = route_class.limiter.check(self._client_key(scope, route_class))
+        if retry_after is not None:
+            await self._reject(send, 429, "Too many requests", retry_after)
+            return
+        if route_class.in_flight >= route_class.concurrency:
+            await self._reject(send, 503, "Server busy, try again shortly", 1)
+            return
+
+        route_class.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.in_flight -= 1
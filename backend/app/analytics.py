@@ -0,0 +1,219 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, insert, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from .models import RouteSearchRollup, RouteSearchRollupUser, SearchHistory
+
+GRANULARITIES = ("hour", "day")
+
+# Usuários por hora (route_search_rollup_users) só servem para deduplicar unique_users de períodos
+# ainda abertos; ficam guardados por esta janela (no mínimo o dia corrente inteiro) e depois são apagados
+MEMBER_RETENTION = timedelta(hours=max(25, int(os.getenv("ANALYTICS_MEMBER_RETENTION_HOURS", "48"))))
+PRUNE_INTERVAL = timedelta(minutes=5)
+_last_prune = datetime.min.replace(tzinfo=timezone.utc)
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Início do período (UTC, sem timezone) que contém o instante"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _dialect_insert(db: Session):
+    # Upsert (ON CONFLICT) nos bancos suportados pelo DATABASE_URL
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+def _aggregate(searches, now: datetime):
+    """Totais (buscas, resultados) e usuários distintos por (granularidade, período, origem, destino)"""
+    totals = defaultdict(lambda: [0, 0])
+    users = defaultdict(set)
+    for search in searches:
+        moment = search.get("search_date") or now
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(moment, granularity), search["origin"].upper(), search["destination"].upper())
+            totals[key][0] += 1
+            totals[key][1] += search.get("results_count") or 0
+            users[key].add(search["user_id"])
+    return totals, users
+
+def _upsert_rollups(db: Session, totals: dict, new_users: dict):
+    stmt = _dialect_insert(db)(RouteSearchRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["granularity", "bucket_start", "origin", "destination"],
+        set_={
+            "searches": RouteSearchRollup.searches + stmt.excluded.searches,
+            "results_total": RouteSearchRollup.results_total + stmt.excluded.results_total,
+            "unique_users": RouteSearchRollup.unique_users + stmt.excluded.unique_users,
+        },
+    )
+    db.execute(stmt, [
+        {
+            "granularity": key[0], "bucket_start": key[1], "origin": key[2], "destination": key[3],
+            "searches": count, "results_total": results, "unique_users": new_users.get(key, 0),
+        }
+        for key, (count, results) in totals.items()
+    ])
+
+def member_cutoff(now: datetime) -> datetime:
+    """Hora mais antiga cujos usuários ainda são mantidos em route_search_rollup_users"""
+    return bucket_start(now - MEMBER_RETENTION, "hour")
+
+def prune_members(db: Session, now: datetime | None = None) -> int:
+    """Apaga os usuários por hora fora da janela de retenção (sem commit)"""
+    global _last_prune
+    now = now or datetime.now(timezone.utc)
+    _last_prune = now
+    result = db.execute(delete(RouteSearchRollupUser).where(RouteSearchRollupUser.bucket_start < member_cutoff(now)))
+    return result.rowcount
+
+def record_searches(db: Session, searches: list[dict]):
+    """
+    Soma um lote de buscas nos rollups, na transação do chamador (sem commit).
+    Cada item tem user_id, origin, destination, results_count e search_date (opcional, padrão agora).
+    Buscas anteriores à janela de retenção contam em searches, mas não em unique_users (use o backfill).
+    """
+    if not searches:
+        return
+    now = datetime.now(timezone.utc)
+    cutoff = member_cutoff(now)
+    totals, users = _aggregate(searches, now)
+
+    # Só a granularidade horária guarda usuários; os novos na hora voltam no RETURNING
+    members = [
+        {"granularity": "hour", "bucket_start": key[1], "origin": key[2], "destination": key[3], "user_id": user_id}
+        for key, key_users in users.items() if key[0] == "hour" and key[1] >= cutoff
+        for user_id in key_users
+    ]
+    if not members:
+        _upsert_rollups(db, totals, {})
+        return
+    inserted = db.execute(
+        _dialect_insert(db)(RouteSearchRollupUser)
+        .on_conflict_do_nothing()
+        .returning(
+            RouteSearchRollupUser.bucket_start, RouteSearchRollupUser.origin,
+            RouteSearchRollupUser.destination, RouteSearchRollupUser.user_id,
+        ),
+        members,
+    ).all()
+
+    new_users = defaultdict(int)
+    new_hours = defaultdict(int)
+    for hour, origin, destination, user_id in inserted:
+        new_users[("hour", hour, origin, destination)] += 1
+        new_hours[(bucket_start(hour, "day"), origin, destination, user_id)] += 1
+
+    # Novo no dia = todas as horas do usuário naquele dia acabaram de ser inseridas
+    # (a retenção cobre o dia corrente inteiro, então as horas anteriores ainda estão na tabela)
+    if new_hours:
+        first_day = min(day for day, *_ in new_hours)
+        hours_in_day = db.query(
+            RouteSearchRollupUser.bucket_start, RouteSearchRollupUser.origin,
+            RouteSearchRollupUser.destination, RouteSearchRollupUser.user_id,
+        ).filter(
+            RouteSearchRollupUser.granularity == "hour",
+            RouteSearchRollupUser.bucket_start >= first_day,
+            tuple_(
+                RouteSearchRollupUser.origin, RouteSearchRollupUser.destination, RouteSearchRollupUser.user_id
+            ).in_(list({key[1:] for key in new_hours})),
+        )
+        existing = defaultdict(int)
+        for hour, origin, destination, user_id in hours_in_day:
+            existing[(bucket_start(hour, "day"), origin, destination, user_id)] += 1
+        for key, count in new_hours.items():
+            if existing[key] == count:
+                new_users[("day", *key[:3])] += 1
+
+    _upsert_rollups(db, totals, new_users)
+    if now - _last_prune >= PRUNE_INTERVAL:
+        prune_members(db, now)
+
+def backfill_rollups(db: Session) -> int:
+    """
+    Recalcula os rollups a partir de todo o search_history, um dia por vez (um commit por dia).
+    unique_users é exato por período; os usuários por hora só são regravados dentro da janela de retenção.
+    """
+    db.execute(delete(RouteSearchRollupUser))
+    db.execute(delete(RouteSearchRollup))
+    db.commit()
+
+    first, last = db.query(func.min(SearchHistory.search_date), func.max(SearchHistory.search_date)).one()
+    if first is None:
+        return 0
+    now = datetime.now(timezone.utc)
+    cutoff = member_cutoff(now)
+    processed = 0
+    day, last_day = bucket_start(first, "day"), bucket_start(last, "day")
+    while day <= last_day:
+        next_day = day + timedelta(days=1)
+        rows = db.query(
+            SearchHistory.user_id, SearchHistory.origin, SearchHistory.destination,
+            SearchHistory.results_count, SearchHistory.search_date,
+        ).filter(SearchHistory.search_date >= day, SearchHistory.search_date < next_day).all()
+        if rows:
+            totals, users = _aggregate([row._asdict() for row in rows], now)
+            _upsert_rollups(db, totals, {key: len(key_users) for key, key_users in users.items()})
+            members = [
+                {"granularity": "hour", "bucket_start": key[1], "origin": key[2], "destination": key[3], "user_id": user_id}
+                for key, key_users in users.items() if key[0] == "hour" and key[1] >= cutoff
+                for user_id in key_users
+            ]
+            if members:
+                db.execute(insert(RouteSearchRollupUser), members)
+            db.commit()
+            processed += len(rows)
+        day = next_day
+    return processed
+
+def top_routes(db: Session, granularity: str, since: datetime, limit: int = 10) -> list[dict]:
+    """
+    Rotas mais buscadas desde `since`, lidas apenas dos rollups.
+    unique_users soma os usuários distintos de cada período (quem buscou em dois períodos conta duas vezes).
+    """
+    routes = db.query(
+        RouteSearchRollup.origin,
+        RouteSearchRollup.destination,
+        func.sum(RouteSearchRollup.searches).label("searches"),
+        func.sum(RouteSearchRollup.results_total).label("results_total"),
+        func.sum(RouteSearchRollup.unique_users).label("unique_users"),
+    ).filter(
+        RouteSearchRollup.granularity == granularity,
+        RouteSearchRollup.bucket_start >= since,
+    ).group_by(RouteSearchRollup.origin, RouteSearchRollup.destination)\
+        .order_by(func.sum(RouteSearchRollup.searches).desc()).limit(limit).all()
+    return [
+        {
+            "origin": route.origin,
+            "destination": route.destination,
+            "searches": route.searches,
+            "unique_users": route.unique_users,
+            "avg_results": round(route.results_total / route.searches, 2) if route.searches else 0.0,
+        }
+        for route in routes
+    ]
+
+def route_timeseries(db: Session, origin: str, destination: str, granularity: str, since: datetime) -> list[dict]:
+    """Série temporal de uma rota, lida apenas dos rollups"""
+    rows = db.query(RouteSearchRollup).filter(
+        RouteSearchRollup.granularity == granularity,
+        RouteSearchRollup.origin == origin,
+        RouteSearchRollup.destination == destination,
+        RouteSearchRollup.bucket_start >= since,
+    ).order_by(RouteSearchRollup.bucket_start).all()
+    return [
+        {
+            "bucket_start": row.bucket_start,
+            "searches": row.searches,
+            "unique_users": row.unique_users,
+            "avg_results": round(row.results_total / row.searches, 2) if row.searches else 0.0,
+        }
+        for row in rows
+    ]
+
+def window_start(granularity: str, periods: int) -> datetime:
+    """Início de uma janela com os últimos `periods` períodos, incluindo o atual"""
+    step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+    return bucket_start(datetime.now(timezone.utc), granularity) - step * (periods - 1)
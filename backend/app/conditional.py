@@ -0,0 +1,23 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+
+def make_etag(*parts) -> str:
+    """Gera um ETag fraco a partir de valores derivados dos dados"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Retorna uma resposta 304 se o If-None-Match do cliente bate com o ETag atual"""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return None
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    if "*" in candidates or etag.removeprefix("W/") in candidates:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
+    return None
+
+def cache_headers(etag: str) -> dict:
+    # private + no-cache: o app pode guardar a resposta, mas sempre revalida com o ETag
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
@@ -1,8 +1,13 @@
+from sqlalchemy import insert, update, delete, func
 from sqlalchemy.orm import Session
 from .models import User, Alert, SearchHistory
-from .schemas import UserCreate, AlertCreate, AlertUpdate, FlightSearchRequest
+from .analytics import record_searches
+from .flight_query import FLIGHT_DTYPE
+from .schemas import UserCreate, AlertCreate, AlertUpdate, AlertBulkUpdateItem, FlightSearchRequest
 from passlib.context import CryptContext
-import random
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import os
 import string
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -43,6 +48,14 @@ def get_alerts_by_user(db: Session, user_id: int):
     """Busca todos os alertas de um usuário"""
     return db.query(Alert).filter(Alert.user_id == user_id).all()
 
+def get_alerts_version(db: Session, user_id: int) -> list[tuple]:
+    """Colunas cruas dos alertas do usuário, sem montar objetos ORM, para derivar o validador da lista"""
+    # Alertas podem ser atualizados sem mudar created_at ou a quantidade, então todas as colunas entram
+    return db.query(
+        Alert.id, Alert.origin, Alert.destination, Alert.target_price,
+        Alert.is_active, Alert.created_at, Alert.last_notified
+    ).filter(Alert.user_id == user_id).order_by(Alert.id).all()
+
 def get_alert(db: Session, alert_id: int, user_id: int):
     """Busca um alerta específico de um usuário"""
     return db.query(Alert).filter(Alert.id == alert_id, Alert.user_id == user_id).first()
@@ -74,7 +87,125 @@ def delete_alert(db: Session, alert_id: int, user_id: int):
         db.commit()
     return db_alert
 
+# Alert CRUD em lote
+MAX_BULK_ALERTS = 500
+
+def validate_alert_data(data: dict) -> str | None:
+    """Valida campos de um alerta; retorna a mensagem de erro ou None"""
+    # Colunas NOT NULL: null explícito é inválido, não um campo ausente
+    for field in ("origin", "destination", "target_price", "is_active"):
+        if field in data and data[field] is None:
+            return f"{field} cannot be null"
+    for field in ("origin", "destination"):
+        if field in data and data[field] is not None:
+            code = data[field]
+            if len(code) != 3 or not code.isalpha():
+                return f"{field} must be a 3-letter IATA code"
+            data[field] = code.upper()
+    if data.get("origin") and data.get("origin") == data.get("destination"):
+        return "origin and destination must differ"
+    if data.get("target_price") is not None and data["target_price"] <= 0:
+        return "target_price must be positive"
+    return None
+
+def _fetch_alerts(db: Session, alert_ids: list[int], user_id: int) -> dict[int, Alert]:
+    """Busca vários alertas de um usuário em uma única consulta"""
+    if not alert_ids:
+        return {}
+    alerts = db.query(Alert).filter(Alert.user_id == user_id, Alert.id.in_(alert_ids)).all()
+    return {alert.id: alert for alert in alerts}
+
+def _claim_ids(results: list[dict], alert_ids: list[int]) -> list[tuple[int, int]]:
+    """Marca ids repetidos no pedido como duplicados e devolve os pares (índice, id) restantes"""
+    seen = set()
+    pending = []
+    for index, alert_id in enumerate(alert_ids):
+        if alert_id in seen:
+            results[index] = {"index": index, "id": alert_id, "status": "duplicate", "error": "id repeated in request"}
+            continue
+        seen.add(alert_id)
+        pending.append((index, alert_id))
+    return pending
+
+def bulk_create_alerts(db: Session, alerts: list[AlertCreate], user_id: int) -> list[dict]:
+    """Cria vários alertas com um único INSERT em lote e um único commit"""
+    results: list[dict] = [None] * len(alerts)
+    rows = []
+    for index, alert in enumerate(alerts):
+        data = alert.model_dump()
+        error = validate_alert_data(data)
+        if error:
+            results[index] = {"index": index, "status": "invalid", "error": error}
+        else:
+            rows.append((index, {**data, "user_id": user_id}))
+
+    if rows:
+        inserted = db.scalars(insert(Alert).returning(Alert.id, sort_by_parameter_order=True), [row for _, row in rows]).all()
+        db.commit()
+        created = _fetch_alerts(db, inserted, user_id)
+        for (index, _), alert_id in zip(rows, inserted):
+            results[index] = {"index": index, "id": alert_id, "status": "created", "alert": created[alert_id]}
+    return results
+
+def bulk_update_alerts(db: Session, updates: list[AlertBulkUpdateItem], user_id: int) -> list[dict]:
+    """Atualiza vários alertas com um UPDATE em lote por chave primária e um único commit"""
+    results: list[dict] = [None] * len(updates)
+    pending = _claim_ids(results, [item.id for item in updates])
+    existing = _fetch_alerts(db, [alert_id for _, alert_id in pending], user_id)
+
+    mappings = []
+    updated = []
+    for index, alert_id in pending:
+        if alert_id not in existing:
+            results[index] = {"index": index, "id": alert_id, "status": "not_found", "error": "Alert not found"}
+            continue
+        data = updates[index].model_dump(exclude_unset=True, exclude={"id"})
+        # Valida o alerta resultante, não só os campos enviados
+        current = existing[alert_id]
+        merged = {"origin": current.origin, "destination": current.destination, **data}
+        error = validate_alert_data(merged)
+        if error:
+            results[index] = {"index": index, "id": alert_id, "status": "invalid", "error": error}
+            continue
+        data.update({k: merged[k] for k in ("origin", "destination") if k in data})
+        mappings.append({"id": alert_id, **data})
+        updated.append((index, alert_id))
+
+    if mappings:
+        db.execute(update(Alert), mappings)
+        db.commit()
+        refreshed = _fetch_alerts(db, [alert_id for _, alert_id in updated], user_id)
+        for index, alert_id in updated:
+            results[index] = {"index": index, "id": alert_id, "status": "updated", "alert": refreshed[alert_id]}
+    return results
+
+def bulk_delete_alerts(db: Session, alert_ids: list[int], user_id: int) -> list[dict]:
+    """Deleta vários alertas com um único DELETE e um único commit"""
+    results: list[dict] = [None] * len(alert_ids)
+    pending = _claim_ids(results, alert_ids)
+    existing = _fetch_alerts(db, [alert_id for _, alert_id in pending], user_id)
+
+    for index, alert_id in pending:
+        if alert_id in existing:
+            results[index] = {"index": index, "id": alert_id, "status": "deleted"}
+        else:
+            results[index] = {"index": index, "id": alert_id, "status": "not_found", "error": "Alert not found"}
+
+    if existing:
+        db.execute(
+            delete(Alert)
+            .where(Alert.user_id == user_id, Alert.id.in_(list(existing)))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return results
+
 # Search History CRUD
+def get_search_history_version(db: Session, user_id: int) -> tuple:
+    """Validador barato do histórico (só recebe inserts): quantidade, maior id e busca mais recente"""
+    return db.query(func.count(SearchHistory.id), func.max(SearchHistory.id), func.max(SearchHistory.search_date))\
+        .filter(SearchHistory.user_id == user_id).one()
+
 def get_search_history_by_user(db: Session, user_id: int, limit: int = 50):
     """Busca histórico de buscas de um usuário"""
     return db.query(SearchHistory).filter(SearchHistory.user_id == user_id)\
@@ -90,6 +221,13 @@ def create_search_history(db: Session, search: FlightSearchRequest, user_id: int
         results_count=results_count
     )
     db.add(db_search)
+    # Rollups de analytics atualizados na mesma transação
+    record_searches(db, [{
+        "user_id": user_id,
+        "origin": search.origin,
+        "destination": search.destination,
+        "results_count": results_count,
+    }])
     db.commit()
     db.refresh(db_search)
     return db_search
@@ -104,63 +242,139 @@ BRAZIL_AIRPORTS = {
 def is_domestic_br(origin: str, destination: str) -> bool:
     return origin.upper() in BRAZIL_AIRPORTS and destination.upper() in BRAZIL_AIRPORTS
 
+# Áreas metropolitanas com mais de um aeroporto (código IATA da cidade -> aeroportos)
+METRO_AREAS = {
+    "SAO": ("GRU", "CGH", "VCP"),
+    "RIO": ("GIG", "SDU"),
+}
+AIRPORT_TO_METRO = {airport: metro for metro, airports in METRO_AREAS.items() for airport in airports}
 
-def generate_mock_flights(origin: str, destination: str, departure_date: str, round_trip: bool = False, return_date: str | None = None):
-    """Gera dados mockados de voos. Se round_trip=True, inclui preços de ida/volta e total."""
-    # Companhias nacionais mais comuns
-    airlines = ["LATAM", "GOL", "AZUL"]
-    flights = []
+DEFAULT_METRO_RESULTS = 50
+AIRLINES = ["LATAM", "GOL", "AZUL"]
+PROVIDERS = ["skyscanner", "kayak"]
+search_executor = ThreadPoolExecutor(max_workers=int(os.getenv("SEARCH_WORKERS", "8")))
 
-    for i in range(random.randint(5, 10)):
-        flight_id = f"{random.choice(airlines)[:2]}{random.randint(1000, 9999)}"
-        price = round(random.uniform(200, 2000), 2)
-
-        # URL mockada para provedores populares
-        provider = random.choice(["skyscanner", "kayak"]) 
-        if provider == "skyscanner":
-            # formato aproximado (mock)
-            if round_trip and return_date:
-                url = (
-                    f"https://www.skyscanner.com/transport/flights/{origin.lower()}/{destination.lower()}/"
-                    f"{departure_date.replace('-', '')}/{return_date.replace('-', '')}/"
-                    "?adults=1&cabinclass=economy&preferdirects=false"
-                )
-            else:
-                url = f"https://www.skyscanner.com/transport/flights/{origin.lower()}/{destination.lower()}/{departure_date.replace('-', '')}/?adults=1&cabinclass=economy"
-        else:
-            # Kayak ida e volta exibe com ambos os trechos
-            if round_trip and return_date:
-                url = f"https://www.kayak.com/flights/{origin}-{destination}/{departure_date}/{return_date}?sort=bestflight_a"
-            else:
-                url = f"https://www.kayak.com/flights/{origin}-{destination}/{departure_date}?sort=bestflight_a"
-
-        # Preços mais realistas: faixas diferentes para doméstico BR vs. outros
-        if is_domestic_br(origin, destination):
-            # one-way normalmente entre 150 e 900, média ~450
-            outbound = round(max(150, random.gauss(450, 150)), 2)
-            inbound = round(max(150, random.gauss(450, 150)), 2) if round_trip else None
-        else:
-            # internacional simplificado
-            outbound = round(max(400, random.gauss(1200, 350)), 2)
-            inbound = round(max(400, random.gauss(1200, 350)), 2) if round_trip else None
-        total = round(outbound + (inbound or 0), 2)
-
-        flight = {
-            "id": f"{flight_id}_{i}",
-            "airline": random.choice(airlines),
-            "flight_number": flight_id,
+def expand_airport(code: str, include_nearby: bool = False) -> tuple[str, ...]:
+    """Expande um código de cidade (ex: SAO) ou, opcionalmente, um aeroporto para os aeroportos da região"""
+    code = code.upper()
+    if code in METRO_AREAS:
+        return METRO_AREAS[code]
+    if include_nearby and code in AIRPORT_TO_METRO:
+        return METRO_AREAS[AIRPORT_TO_METRO[code]]
+    return (code,)
+
+def airport_pairs(origin: str, destination: str, include_nearby: bool = False) -> list[tuple[str, str]]:
+    """Todos os pares origem/destino entre as regiões; vazio se ambos estão na mesma cidade"""
+    origin, destination = origin.upper(), destination.upper()
+    # Mesmo aeroporto ou mesma região metropolitana (ex: GRU -> GRU, SAO -> GRU, GRU -> CGH) não é uma busca válida
+    if AIRPORT_TO_METRO.get(origin, origin) == AIRPORT_TO_METRO.get(destination, destination):
+        return []
+    return [(o, d) for o in expand_airport(origin, include_nearby) for d in expand_airport(destination, include_nearby)]
+
+def search_airport_pairs(pairs: list[tuple[str, str]], round_trip: bool = False) -> np.ndarray:
+    """Busca os pares em paralelo e junta os resultados em uma única tabela (FLIGHT_DTYPE)"""
+    tables = search_executor.map(
+        lambda item: generate_mock_flight_table(*item[1], round_trip=round_trip, pair_index=item[0]),
+        enumerate(pairs),
+    )
+    return np.concatenate(list(tables))
+
+
+def generate_mock_flight_table(origin: str, destination: str, round_trip: bool = False, count: int | None = None,
+                               rng: np.random.Generator | None = None, pair_index: int = 0) -> np.ndarray:
+    """Gera voos mockados direto na representação compacta (FLIGHT_DTYPE), em uma passada vetorizada"""
+    rng = rng or np.random.default_rng()
+    count = int(rng.integers(5, 11)) if count is None else count
+    table = np.empty(count, dtype=FLIGHT_DTYPE)
+
+    # Preços mais realistas: faixas diferentes para doméstico BR vs. outros
+    if is_domestic_br(origin, destination):
+        # one-way normalmente entre 150 e 900, média ~450
+        mean, std, floor = 450, 150, 150
+    else:
+        # internacional simplificado
+        mean, std, floor = 1200, 350, 400
+    table["outbound_price"] = np.round(np.maximum(floor, rng.normal(mean, std, size=count)), 2)
+    if round_trip:
+        table["inbound_price"] = np.round(np.maximum(floor, rng.normal(mean, std, size=count)), 2)
+        table["price"] = np.round(table["outbound_price"] + table["inbound_price"], 2)
+    else:
+        table["inbound_price"] = np.nan
+        table["price"] = table["outbound_price"]
+
+    table["airline"] = rng.integers(0, len(AIRLINES), size=count)
+    table["number_airline"] = rng.integers(0, len(AIRLINES), size=count)
+    table["flight_number"] = rng.integers(1000, 10000, size=count)
+    table["departure"] = rng.integers(6, 23, size=count) * 60 + rng.integers(0, 60, size=count)
+    table["arrival"] = rng.integers(6, 23, size=count) * 60 + rng.integers(0, 60, size=count)
+    table["duration"] = rng.integers(1, 9, size=count) * 60 + rng.integers(0, 60, size=count)
+    table["stops"] = rng.integers(0, 3, size=count)
+    table["provider"] = rng.integers(0, len(PROVIDERS), size=count)
+    table["pair"] = pair_index
+    table["seq"] = np.arange(count)
+    return table
+
+
+def flight_url(provider: str, origin: str, destination: str, departure_date: str,
+               round_trip: bool = False, return_date: str | None = None) -> str:
+    """URL mockada para provedores populares"""
+    if provider == "skyscanner":
+        # formato aproximado (mock)
+        if round_trip and return_date:
+            return (
+                f"https://www.skyscanner.com/transport/flights/{origin.lower()}/{destination.lower()}/"
+                f"{departure_date.replace('-', '')}/{return_date.replace('-', '')}/"
+                "?adults=1&cabinclass=economy&preferdirects=false"
+            )
+        return f"https://www.skyscanner.com/transport/flights/{origin.lower()}/{destination.lower()}/{departure_date.replace('-', '')}/?adults=1&cabinclass=economy"
+    # Kayak ida e volta exibe com ambos os trechos
+    if round_trip and return_date:
+        return f"https://www.kayak.com/flights/{origin}-{destination}/{departure_date}/{return_date}?sort=bestflight_a"
+    return f"https://www.kayak.com/flights/{origin}-{destination}/{departure_date}?sort=bestflight_a"
+
+
+def flights_to_dicts(table: np.ndarray, pairs: list[tuple[str, str]], departure_date: str,
+                     round_trip: bool = False, return_date: str | None = None) -> list[dict]:
+    """Monta os voos da resposta só para as linhas da tabela (normalmente já filtradas e limitadas)"""
+    flights = []
+    for (price, duration, departure, arrival, stops, outbound, inbound,
+         airline, number_airline, number, provider, pair, seq) in table.tolist():
+        origin, destination = pairs[pair]
+        flight_number = f"{AIRLINES[number_airline][:2]}{number}"
+        flights.append({
+            "id": f"{flight_number}_{seq}",
+            "airline": AIRLINES[airline],
+            "flight_number": flight_number,
             "origin": origin,
             "destination": destination,
-            "departure_time": f"{random.randint(6, 22):02d}:{random.randint(0, 59):02d}",
-            "arrival_time": f"{random.randint(6, 22):02d}:{random.randint(0, 59):02d}",
-            "duration": f"{random.randint(1, 8)}h {random.randint(0, 59)}m",
-            "price": total if round_trip else outbound,
-            "stops": random.randint(0, 2),
-            "url": url,
+            "departure_time": f"{departure // 60:02d}:{departure % 60:02d}",
+            "arrival_time": f"{arrival // 60:02d}:{arrival % 60:02d}",
+            "duration": f"{duration // 60}h {duration % 60}m",
+            "price": price,
+            "stops": stops,
+            "url": flight_url(PROVIDERS[provider], origin, destination, departure_date, round_trip, return_date),
             "is_round_trip": round_trip,
             "outbound_price": outbound,
-            "inbound_price": inbound,
-        }
-        flights.append(flight)
-
+            "inbound_price": None if inbound != inbound else inbound,  # NaN quando só ida
+        })
     return flights
+
+
+def generate_mock_flights(origin: str, destination: str, departure_date: str, round_trip: bool = False, return_date: str | None = None):
+    """Gera dados mockados de voos. Se round_trip=True, inclui preços de ida/volta e total."""
+    table = generate_mock_flight_table(origin, destination, round_trip=round_trip)
+    return flights_to_dicts(table, [(origin, destination)], departure_date, round_trip, return_date)
+
+
+def generate_mock_fare_calendar(origin: str, destination: str, num_days: int, rng: np.random.Generator | None = None):
+    """Gera em uma única passada vetorizada o menor preço e a quantidade de voos de cada dia"""
+    rng = rng or np.random.default_rng()
+    # Mesma distribuição de generate_mock_flights (somente ida), para todos os dias de uma vez
+    counts = rng.integers(5, 11, size=num_days)
+    if is_domestic_br(origin, destination):
+        prices = np.maximum(150, rng.normal(450, 150, size=counts.sum()))
+    else:
+        prices = np.maximum(400, rng.normal(1200, 350, size=counts.sum()))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    cheapest = np.round(np.minimum.reduceat(prices, starts), 2)
+    return cheapest, counts
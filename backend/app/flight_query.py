@@ -0,0 +1,78 @@
+import numpy as np
+from typing import Optional
+
+# Representação compacta de um conjunto de voos, produzida diretamente pelo gerador.
+# Filtros, ordenação e top-k rodam sobre ela; os dicionários da resposta só são montados
+# (crud.flights_to_dicts) para as linhas que sobrevivem à consulta.
+FLIGHT_DTYPE = np.dtype([
+    ("price", np.float64),
+    ("duration", np.int32),  # minutos
+    ("departure", np.int16),  # minutos desde 00:00
+    ("arrival", np.int16),  # minutos desde 00:00
+    ("stops", np.int8),
+    ("outbound_price", np.float64),
+    ("inbound_price", np.float64),  # NaN quando só ida
+    ("airline", np.int8),  # índice em AIRLINES
+    ("number_airline", np.int8),  # índice em AIRLINES do prefixo do número do voo
+    ("flight_number", np.int16),
+    ("provider", np.int8),  # índice em PROVIDERS
+    ("pair", np.int16),  # índice do par origem/destino buscado
+    ("seq", np.int32),  # posição do voo na geração do par
+])
+
+# Chave principal de cada ordenação; empates são resolvidos pelo preço
+SORT_KEYS = {
+    "price": ("price",),
+    "duration": ("duration", "price"),
+    "departure_time": ("departure", "price"),
+}
+
+def parse_clock(value: str) -> int:
+    """Converte "HH:MM" em minutos desde a meia-noite"""
+    hours, minutes = value.split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time: {value}")
+    return hours * 60 + minutes
+
+def parse_duration(value: str) -> int:
+    """Converte "3h 12m" em minutos"""
+    hours, minutes = value.split("h")
+    return int(hours) * 60 + int(minutes.strip().rstrip("m") or 0)
+
+def query_flight_table(
+    table: np.ndarray,
+    max_stops: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    departure_after: Optional[int] = None,
+    departure_before: Optional[int] = None,
+    sort_by: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> np.ndarray:
+    """Filtra, ordena e aplica top-k de forma vetorizada; retorna as linhas selecionadas"""
+    mask = np.ones(len(table), dtype=bool)
+    if max_stops is not None:
+        mask &= table["stops"] <= max_stops
+    if min_price is not None:
+        mask &= table["price"] >= min_price
+    if max_price is not None:
+        mask &= table["price"] <= max_price
+    if departure_after is not None:
+        mask &= table["departure"] >= departure_after
+    if departure_before is not None:
+        mask &= table["departure"] <= departure_before
+    selected = table[mask]
+
+    if sort_by is None:
+        return selected[:limit] if limit is not None else selected
+
+    keys = SORT_KEYS[sort_by]
+    primary = selected[keys[0]]
+    if limit is not None and limit < len(selected):
+        # Top-k: np.partition é O(n); só os candidatos ao top-k são ordenados de fato.
+        # Empates no limite do k são resolvidos pelo menor preço.
+        kth = np.partition(primary, limit - 1)[limit - 1]
+        selected = selected[primary <= kth]
+    order = np.lexsort(tuple(selected[key] for key in reversed(keys)))
+    return selected[order[:limit]]
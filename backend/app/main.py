@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from .database import engine, Base
-from .routers import auth, flights, users
+from .routers import auth, flights, users, analytics
+from .notifications import dispatcher
+from .admission import AdmissionControlMiddleware
 
 # Criar tabelas no banco de dados
 Base.metadata.create_all(bind=engine)
@@ -13,7 +16,13 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Configurar CORS
+# Compressão gzip negociada via Accept-Encoding para corpos JSON grandes
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+# Controle de admissão (rate limit por usuário/IP e concorrência por classe de rota)
+app.add_middleware(AdmissionControlMiddleware)
+
+# Configurar CORS (adicionado por último para envolver também as respostas 429/503)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Em produção, especifique os domínios permitidos
@@ -26,6 +35,17 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(flights.router)
 app.include_router(users.router)
+app.include_router(analytics.router)
+
+@app.on_event("startup")
+async def start_notification_dispatcher():
+    """Inicia os workers de envio de notificações"""
+    await dispatcher.start()
+
+@app.on_event("shutdown")
+async def stop_notification_dispatcher():
+    """Entrega o que restou na fila e para os workers"""
+    await dispatcher.stop()
 
 @app.get("/")
 def root():
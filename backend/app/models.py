@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -42,8 +42,35 @@ class SearchHistory(Base):
     origin = Column(String(3), nullable=False)
     destination = Column(String(3), nullable=False)
     departure_date = Column(String, nullable=False)  # Formato YYYY-MM-DD
-    search_date = Column(DateTime(timezone=True), server_default=func.now())
+    search_date = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     results_count = Column(Integer, default=0)
 
     # Relacionamento
     user = relationship("User", back_populates="search_history")
+
+class RouteSearchRollup(Base):
+    """Agregado de buscas por rota e período (hora ou dia), mantido incrementalmente"""
+    __tablename__ = "route_search_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", "origin", "destination", name="uq_route_search_rollup"),
+        Index("ix_route_search_rollups_bucket", "granularity", "bucket_start"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(4), nullable=False)  # "hour" ou "day"
+    bucket_start = Column(DateTime, nullable=False)  # Início do período (UTC)
+    origin = Column(String(3), nullable=False)
+    destination = Column(String(3), nullable=False)
+    searches = Column(Integer, nullable=False, default=0)
+    results_total = Column(Integer, nullable=False, default=0)
+    unique_users = Column(Integer, nullable=False, default=0)
+
+class RouteSearchRollupUser(Base):
+    """Usuários que buscaram uma rota em cada hora, mantidos só na janela de retenção (base de unique_users)"""
+    __tablename__ = "route_search_rollup_users"
+
+    granularity = Column(String(4), primary_key=True)  # sempre "hour"
+    bucket_start = Column(DateTime, primary_key=True)
+    origin = Column(String(3), primary_key=True)
+    destination = Column(String(3), primary_key=True)
+    user_id = Column(Integer, primary_key=True)
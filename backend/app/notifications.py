@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from .admission import RateLimiter
+from .database import SessionLocal
+from .models import Alert
+
+NOTIFICATION_QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "10000"))
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "100"))
+NOTIFICATION_BATCH_WAIT = float(os.getenv("NOTIFICATION_BATCH_WAIT", "0.05"))
+NOTIFICATION_WORKERS = int(os.getenv("NOTIFICATION_WORKERS", "2"))
+NOTIFICATION_MAX_RETRIES = int(os.getenv("NOTIFICATION_MAX_RETRIES", "3"))
+NOTIFICATION_BACKOFF_BASE = float(os.getenv("NOTIFICATION_BACKOFF_BASE", "0.5"))
+NOTIFICATION_USER_RATE = float(os.getenv("NOTIFICATION_USER_RATE", "10"))  # por minuto
+NOTIFICATION_COOLDOWN_MINUTES = int(os.getenv("NOTIFICATION_COOLDOWN_MINUTES", "60"))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class NotificationJob:
+    """Notificação pendente de entrega"""
+    user_id: int
+    alert_id: Optional[int]
+    title: str
+    body: str
+    data: dict = field(default_factory=dict)
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class PushGateway(ABC):
+    """Interface de um gateway de push; recebe lotes e devolve o status de cada item"""
+
+    @abstractmethod
+    async def send_batch(self, jobs: list[NotificationJob]) -> list[bool]:
+        ...
+
+
+class StubPushGateway(PushGateway):
+    """Gateway local para desenvolvimento e benchmark: simula latência e falhas"""
+
+    def __init__(self, latency: float = 0.01, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.delivered: list[tuple[NotificationJob, float]] = []
+
+    async def send_batch(self, jobs: list[NotificationJob]) -> list[bool]:
+        await asyncio.sleep(self.latency)
+        now = time.perf_counter()
+        results = []
+        for job in jobs:
+            ok = random.random() >= self.failure_rate
+            if ok:
+                self.delivered.append((job, now))
+            results.append(ok)
+        return results
+
+
+class NotificationDispatcher:
+    """Fila assíncrona limitada com entrega em lotes, retentativas e limites por usuário"""
+
+    def __init__(
+        self,
+        gateway: PushGateway,
+        session_factory: Optional[Callable] = None,
+        queue_size: int = NOTIFICATION_QUEUE_SIZE,
+        batch_size: int = NOTIFICATION_BATCH_SIZE,
+        batch_wait: float = NOTIFICATION_BATCH_WAIT,
+        workers: int = NOTIFICATION_WORKERS,
+        max_retries: int = NOTIFICATION_MAX_RETRIES,
+        backoff_base: float = NOTIFICATION_BACKOFF_BASE,
+        user_rate_per_minute: float = NOTIFICATION_USER_RATE,
+        cooldown: timedelta = timedelta(minutes=NOTIFICATION_COOLDOWN_MINUTES),
+    ):
+        self.gateway = gateway
+        self.session_factory = session_factory
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.user_rate_per_minute = user_rate_per_minute
+        self.cooldown = cooldown
+
+        self.queue: Optional[asyncio.Queue] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: list[asyncio.Task] = []
+        self._retrying = 0
+        # Limite por usuário com descarte LRU dos usuários inativos
+        self._user_limiter = RateLimiter(user_rate_per_minute / 60.0, max(1.0, user_rate_per_minute))
+        # Alertas com notificação na fila e última entrega conhecida (antes de persistir),
+        # em ordem de entrega para descartar as entradas que já passaram do cooldown
+        self._pending_alerts: set[int] = set()
+        self._recent_alerts: OrderedDict[int, datetime] = OrderedDict()
+        self.stats = {
+            "enqueued": 0, "delivered": 0, "failed": 0, "retried": 0,
+            "deduplicated": 0, "rate_limited": 0, "dropped": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self):
+        """Inicia os workers no loop atual"""
+        if self.running:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain: bool = True):
+        """Para os workers, opcionalmente esperando a fila esvaziar"""
+        if not self.running:
+            return
+        if drain:
+            await self.queue.join()
+            while self._retrying:
+                await asyncio.sleep(self.backoff_base / 4)
+                await self.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _is_duplicate(self, alert_id: int, last_notified: Optional[datetime]) -> bool:
+        if alert_id in self._pending_alerts:
+            return True
+        last = self._recent_alerts.get(alert_id, last_notified)
+        if last is None:
+            return False
+        if last.tzinfo is None:
+            last = last.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - last < self.cooldown
+
+    def _allow_user(self, user_id: int) -> bool:
+        return self._user_limiter.check(str(user_id)) is None
+
+    def _expire_recent_alerts(self, now: datetime):
+        """Remove entregas mais antigas que o cooldown (o banco já tem last_notified)"""
+        while self._recent_alerts:
+            alert_id, delivered_at = next(iter(self._recent_alerts.items()))
+            if now - delivered_at < self.cooldown:
+                break
+            self._recent_alerts.popitem(last=False)
+
+    def enqueue(self, job: NotificationJob, last_notified: Optional[datetime] = None, dedupe: bool = True) -> str:
+        """Coloca uma notificação na fila; deve ser chamado no loop dos workers"""
+        if dedupe and job.alert_id is not None and self._is_duplicate(job.alert_id, last_notified):
+            self.stats["deduplicated"] += 1
+            return "deduplicated"
+        if not self._allow_user(job.user_id):
+            self.stats["rate_limited"] += 1
+            return "rate_limited"
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return "dropped"
+        if job.alert_id is not None:
+            self._pending_alerts.add(job.alert_id)
+        self.stats["enqueued"] += 1
+        return "queued"
+
+    def submit(self, job: NotificationJob, last_notified: Optional[datetime] = None, dedupe: bool = True) -> str:
+        """Versão thread-safe de `enqueue` para rotas síncronas (threadpool)"""
+        if not self.running:
+            return "unavailable"
+        future = asyncio.run_coroutine_threadsafe(self._enqueue_async(job, last_notified, dedupe), self.loop)
+        return future.result(timeout=5)
+
+    async def _enqueue_async(self, job, last_notified, dedupe):
+        return self.enqueue(job, last_notified, dedupe)
+
+    def notify_alert(self, alert: Alert, title: str, body: str, dedupe: bool = True) -> str:
+        """Enfileira uma notificação de alerta de preço"""
+        job = NotificationJob(
+            user_id=alert.user_id,
+            alert_id=alert.id,
+            title=title,
+            body=body,
+            data={
+                "type": "price_alert",
+                "origin": alert.origin,
+                "destination": alert.destination,
+                "targetPrice": alert.target_price,
+            },
+        )
+        return self.submit(job, alert.last_notified, dedupe)
+
+    async def _next_batch(self) -> list[NotificationJob]:
+        batch = [await self.queue.get()]
+        deadline = self.loop.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._deliver(batch)
+            except Exception:
+                # Um lote com erro não pode derrubar o worker (a fila pararia de andar e stop() travaria)
+                logger.exception("Failed to deliver a batch of %d notifications", len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _deliver(self, batch: list[NotificationJob]):
+        try:
+            results = await self.gateway.send_batch(batch)
+        except Exception:
+            results = [False] * len(batch)
+        # Itens sem status do gateway contam como falha (e entram nas retentativas)
+        results = list(results)[:len(batch)]
+        results += [False] * (len(batch) - len(results))
+
+        delivered_alerts = []
+        for job, ok in zip(batch, results):
+            if ok:
+                self.stats["delivered"] += 1
+                if job.alert_id is not None:
+                    self._pending_alerts.discard(job.alert_id)
+                    delivered_alerts.append(job.alert_id)
+            elif job.attempts < self.max_retries:
+                self._schedule_retry(job)
+            else:
+                self.stats["failed"] += 1
+                if job.alert_id is not None:
+                    self._pending_alerts.discard(job.alert_id)
+
+        if delivered_alerts:
+            now = datetime.now(timezone.utc)
+            for alert_id in delivered_alerts:
+                self._recent_alerts[alert_id] = now
+                self._recent_alerts.move_to_end(alert_id)
+            self._expire_recent_alerts(now)
+            if self.session_factory is not None:
+                try:
+                    await asyncio.to_thread(self._mark_notified, delivered_alerts, now)
+                except Exception:
+                    # A entrega já aconteceu; o cooldown em memória (_recent_alerts) segue deduplicando
+                    logger.exception("Failed to persist last_notified for %d alerts", len(delivered_alerts))
+
+    def _schedule_retry(self, job: NotificationJob):
+        # Backoff exponencial com jitter; a retentativa volta para a fila sem bloquear o worker
+        job.attempts += 1
+        self.stats["retried"] += 1
+        delay = self.backoff_base * (2 ** (job.attempts - 1)) * random.uniform(0.5, 1.5)
+        self._retrying += 1
+        self.loop.call_later(delay, self._requeue, job)
+
+    def _requeue(self, job: NotificationJob):
+        self._retrying -= 1
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats["failed"] += 1
+            if job.alert_id is not None:
+                self._pending_alerts.discard(job.alert_id)
+
+    def _mark_notified(self, alert_ids: list[int], when: datetime):
+        """Atualiza `last_notified` de todos os alertas entregues em um único UPDATE"""
+        db = self.session_factory()
+        try:
+            db.query(Alert).filter(Alert.id.in_(alert_ids))\
+                .update({Alert.last_notified: when}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+def create_default_dispatcher() -> NotificationDispatcher:
+    """Dispatcher usado pela API, com o gateway local"""
+    return NotificationDispatcher(StubPushGateway(), session_factory=SessionLocal)
+
+
+dispatcher = create_default_dispatcher()
@@ -0,0 +1,45 @@
+import json
+import numpy as np
+
+# Formato gerado por ai/model.py (export_inference_bundle); só depende de NumPy para inferência
+BUNDLE_FORMAT = "voe-barato-linear-price-model"
+BUNDLE_VERSION = 1
+BUNDLE_FEATURES = ["origin_code", "destination_code", "days_ahead"]
+
+
+class LinearPriceModel:
+    """Regressão linear de preços avaliada só com NumPy, a partir do bundle exportado"""
+
+    def __init__(self, coefficients, intercept: float, airport_codes: dict):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.airport_codes = airport_codes
+
+    @classmethod
+    def load(cls, path: str) -> "LinearPriceModel":
+        """Carrega e valida um bundle de inferência"""
+        with open(path, encoding="utf-8") as f:
+            bundle = json.load(f)
+        if bundle.get("format") != BUNDLE_FORMAT or bundle.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported price model bundle: {bundle.get('format')} v{bundle.get('version')}")
+        if bundle.get("features") != BUNDLE_FEATURES:
+            raise ValueError(f"Unexpected bundle features: {bundle.get('features')}")
+        return cls(bundle["coefficients"], bundle["intercept"], bundle["airport_codes"])
+
+    def encode(self, airport: str) -> int:
+        # Aeroportos desconhecidos viram 0, como em ai/model.predict_flight_price
+        return self.airport_codes.get(airport, 0)
+
+    def predict_features(self, features: np.ndarray) -> np.ndarray:
+        """Equivalente a LinearRegression.predict para uma matriz de features"""
+        return features @ self.coefficients + self.intercept
+
+    def predict(self, origin: str, destination: str, days_ahead) -> np.ndarray:
+        """Previsão vetorizada para uma rota e um ou vários valores de days_ahead"""
+        days_ahead = np.atleast_1d(np.asarray(days_ahead, dtype=np.float64))
+        features = np.column_stack((
+            np.full(len(days_ahead), self.encode(origin), dtype=np.float64),
+            np.full(len(days_ahead), self.encode(destination), dtype=np.float64),
+            days_ahead,
+        ))
+        return np.maximum(0, self.predict_features(features))
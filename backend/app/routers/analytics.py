@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Literal
+from ..database import get_db
+from ..schemas import TopRoutesResponse, RouteTimeseriesResponse
+from ..analytics import top_routes, route_timeseries, window_start
+from ..dependencies import get_current_admin
+from ..models import User
+
+router = APIRouter(prefix="/admin/analytics", tags=["analytics"])
+
+# Tamanho máximo da janela consultada, em períodos
+MAX_PERIODS = {"hour": 24 * 14, "day": 365}
+
+def _since(granularity: str, periods: int):
+    if periods > MAX_PERIODS[granularity]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_PERIODS[granularity]} periods for granularity '{granularity}'"
+        )
+    return window_start(granularity, periods)
+
+@router.get("/routes/top", response_model=TopRoutesResponse)
+def read_top_routes(
+    granularity: Literal["hour", "day"] = "day",
+    periods: int = Query(7, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Rotas mais buscadas nos últimos períodos (a partir dos rollups)"""
+    since = _since(granularity, periods)
+    return TopRoutesResponse(
+        granularity=granularity,
+        since=since,
+        routes=top_routes(db, granularity, since, limit)
+    )
+
+@router.get("/routes/{origin}/{destination}/timeseries", response_model=RouteTimeseriesResponse)
+def read_route_timeseries(
+    origin: str,
+    destination: str,
+    granularity: Literal["hour", "day"] = "day",
+    periods: int = Query(30, ge=1),
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Série temporal de buscas de uma rota (a partir dos rollups)"""
+    since = _since(granularity, periods)
+    origin, destination = origin.upper(), destination.upper()
+    return RouteTimeseriesResponse(
+        origin=origin,
+        destination=destination,
+        granularity=granularity,
+        points=route_timeseries(db, origin, destination, granularity, since)
+    )
@@ -1,25 +1,52 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..schemas import FlightSearchRequest, FlightSearchResponse, PricePredictionRequest, PricePredictionResponse
-from ..crud import create_search_history, generate_mock_flights
+from ..schemas import (
+    FlightSearchRequest, FlightSearchResponse, PricePredictionRequest, PricePredictionResponse,
+    CalendarSearchRequest, CalendarSearchResponse
+)
+from ..crud import (
+    create_search_history, generate_mock_flight_table, generate_mock_fare_calendar, flights_to_dicts,
+    airport_pairs, search_airport_pairs, DEFAULT_METRO_RESULTS
+)
 from ..dependencies import get_current_user
+from ..flight_query import parse_clock, query_flight_table
 from ..models import User
-import joblib
+from ..price_model import LinearPriceModel
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+import numpy as np
 import os
 import random
 
 router = APIRouter(prefix="/flights", tags=["flights"])
 
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "../ai/price_predictor.joblib")
+# Bundle de inferência gerado por ai/model.py na raiz do backend (só NumPy; sem scikit-learn/pandas)
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "../..")
+MODEL_PATH = os.getenv("PRICE_MODEL_PATH", os.path.join(BACKEND_DIR, "price_predictor.json"))
 
+MAX_CALENDAR_DAYS = 60
+# Tendência: compara com a previsão de comprar alguns dias depois (days_ahead menor)
+TREND_WINDOW_DAYS = 7
+TREND_STABLE_TOLERANCE = 0.01
+
+@lru_cache(maxsize=1)
 def load_price_model():
-    """Carrega o modelo de previsão de preços"""
+    """Carrega o modelo de previsão de preços (uma vez por processo)"""
     try:
-        return joblib.load(MODEL_PATH)
+        return LinearPriceModel.load(MODEL_PATH)
     except:
         return None
 
+def predict_prices(origin: str, destination: str, days_ahead: np.ndarray) -> np.ndarray:
+    """Previsão vetorizada: uma única avaliação do modelo para todos os valores de days_ahead"""
+    model = load_price_model()
+    if model is None:
+        # Mesmo fallback de predict_price, aplicado a todos os dias
+        base_price = np.random.uniform(300, 1500)
+        return base_price + days_ahead * np.random.uniform(-10, 10, size=len(days_ahead))
+    return model.predict(origin, destination, days_ahead)
+
 def predict_price(origin: str, destination: str, days_ahead: int) -> PricePredictionResponse:
     """Faz previsão de preço usando o modelo de ML"""
     model = load_price_model()
@@ -29,10 +56,14 @@ def predict_price(origin: str, destination: str, days_ahead: int) -> PricePredic
         predicted_price = base_price + (days_ahead * random.uniform(-10, 10))
         trend = "up" if predicted_price > base_price else "down"
     else:
-        # Aqui seria a lógica real de previsão usando o modelo treinado
-        # Por enquanto, usamos dados mockados
-        predicted_price = random.uniform(300, 1500)
-        trend = random.choice(["up", "down", "stable"])
+        # Uma única avaliação do modelo para hoje e para a compra TREND_WINDOW_DAYS depois
+        later = max(0, days_ahead - TREND_WINDOW_DAYS)
+        predicted_price, later_price = (float(p) for p in model.predict(origin, destination, [days_ahead, later]))
+        change = later_price - predicted_price
+        if abs(change) <= TREND_STABLE_TOLERANCE * max(predicted_price, 1.0):
+            trend = "stable"
+        else:
+            trend = "up" if change > 0 else "down"
 
     return PricePredictionResponse(
         predicted_price=round(predicted_price, 2),
@@ -46,6 +77,22 @@ def search_flights(
     db: Session = Depends(get_db)
 ):
     """Busca voos com dados mockados e registra no histórico"""
+    try:
+        departure_after = parse_clock(search_request.departure_after) if search_request.departure_after else None
+        departure_before = parse_clock(search_request.departure_before) if search_request.departure_before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Departure window must use the HH:MM format")
+    if search_request.limit is not None and search_request.limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+
+    pairs = airport_pairs(
+        search_request.origin,
+        search_request.destination,
+        include_nearby=bool(search_request.include_nearby_airports)
+    )
+    if not pairs:
+        raise HTTPException(status_code=400, detail="Origin and destination must be in different cities")
+
     try:
         # Gera dados mockados de voos
         # Verifica se foi enviada uma sugestão de ida e volta via query params opcionais
@@ -59,12 +106,31 @@ def search_flights(
         except Exception:
             pass
 
-        flights = generate_mock_flights(
-            search_request.origin,
-            search_request.destination,
-            search_request.departure_date,
-            round_trip=bool(round_trip),
-            return_date=return_date
+        filters = {
+            "max_stops": search_request.max_stops,
+            "min_price": search_request.min_price,
+            "max_price": search_request.max_price,
+            "departure_after": departure_after,
+            "departure_before": departure_before,
+        }
+        has_filters = any(value is not None for value in filters.values())
+        # Buscas em região metropolitana sempre voltam limitadas; limite sem ordenação explícita ordena por preço
+        limit = search_request.limit
+        if limit is None and len(pairs) > 1:
+            limit = DEFAULT_METRO_RESULTS
+        sort_by = search_request.sort_by or ("price" if limit is not None else None)
+
+        # Os voos circulam como tabela compacta; os dicionários só são montados para o resultado final
+        if len(pairs) == 1:
+            table = generate_mock_flight_table(*pairs[0], round_trip=bool(round_trip))
+        else:
+            # Região metropolitana: pares buscados em paralelo
+            table = search_airport_pairs(pairs, round_trip=bool(round_trip))
+
+        if has_filters or sort_by is not None:
+            table = query_flight_table(table, limit=limit, sort_by=sort_by, **filters)
+        flights = flights_to_dicts(
+            table, pairs, search_request.departure_date, round_trip=bool(round_trip), return_date=return_date
         )
 
         # Registra a busca no histórico
@@ -86,6 +152,76 @@ def search_flights(
             detail=f"Error searching flights: {str(e)}"
         )
 
+@router.post("/calendar", response_model=CalendarSearchResponse)
+def search_fare_calendar(
+    calendar_request: CalendarSearchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Retorna o menor preço e o preço previsto de cada dia de uma janela de datas"""
+    try:
+        start = datetime.strptime(calendar_request.start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(calendar_request.end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must use the YYYY-MM-DD format")
+
+    num_days = (end - start).days + 1
+    if num_days < 1:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if num_days > MAX_CALENDAR_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date window must be at most {MAX_CALENDAR_DAYS} days")
+
+    origin = calendar_request.origin.upper()
+    destination = calendar_request.destination.upper()
+    pairs = airport_pairs(origin, destination, include_nearby=bool(calendar_request.include_nearby_airports))
+    if not pairs:
+        raise HTTPException(status_code=400, detail="Origin and destination must be in different cities")
+
+    try:
+        dates = [(start + timedelta(days=i)).isoformat() for i in range(num_days)]
+
+        # Por par: uma passada vetorizada no gerador e uma chamada ao modelo para toda a janela;
+        # cada dia fica com o menor preço entre os pares
+        days_ahead = np.maximum(1, (start - date.today()).days + np.arange(num_days))
+        calendars = [generate_mock_fare_calendar(o, d, num_days) for o, d in pairs]
+        cheapest = np.min([prices for prices, _ in calendars], axis=0)
+        counts = np.sum([day_counts for _, day_counts in calendars], axis=0)
+        predicted = np.round(np.min([predict_prices(o, d, days_ahead) for o, d in pairs], axis=0), 2)
+
+        # Um único registro no histórico para a janela inteira (intervalo ISO 8601), com a média
+        # de voos por dia para não distorcer avg_results dos rollups
+        search_history = create_search_history(
+            db=db,
+            search=FlightSearchRequest(
+                origin=origin,
+                destination=destination,
+                departure_date=f"{dates[0]}/{dates[-1]}"
+            ),
+            user_id=current_user.id,
+            results_count=int(round(counts.mean()))
+        )
+
+        days = [
+            {
+                "date": day,
+                "cheapest_price": float(price),
+                "predicted_price": float(prediction),
+                "flights_count": int(count),
+            }
+            for day, price, prediction, count in zip(dates, cheapest, predicted, counts)
+        ]
+        return CalendarSearchResponse(
+            days=days,
+            cheapest_date=dates[int(np.argmin(cheapest))],
+            search_id=f"search_{search_history.id}"
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error searching fare calendar: {str(e)}"
+        )
+
 @router.post("/predict", response_model=PricePredictionResponse)
 def predict_flight_price(
     prediction_request: PricePredictionRequest,
@@ -1,20 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..schemas import Alert, AlertCreate, AlertUpdate, SearchHistory
+from ..schemas import (
+    Alert, AlertCreate, AlertUpdate, AlertBulkUpdateItem, AlertBulkDelete, AlertBulkResponse, SearchHistory
+)
 from ..crud import (
     get_alerts_by_user, get_alert, create_alert, update_alert, delete_alert,
-    get_search_history_by_user
+    bulk_create_alerts, bulk_update_alerts, bulk_delete_alerts, MAX_BULK_ALERTS,
+    get_alerts_version, get_search_history_by_user, get_search_history_version
 )
+from ..conditional import make_etag, not_modified, cache_headers
 from ..dependencies import get_current_user
 from ..models import User
+from ..notifications import dispatcher
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 # Alert routes
 @router.get("/me/alerts", response_model=list[Alert])
-def read_user_alerts(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Retorna todos os alertas do usuário logado"""
+def read_user_alerts(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Retorna todos os alertas do usuário logado (304 se nada mudou desde o ETag enviado)"""
+    etag = make_etag("alerts", current_user.id, get_alerts_version(db, current_user.id))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers.update(cache_headers(etag))
     alerts = get_alerts_by_user(db, current_user.id)
     return alerts
 
@@ -33,6 +48,51 @@ def create_user_alert(
             detail=f"Error creating alert: {str(e)}"
         )
 
+def _run_bulk(operation, items, current_user: User, db: Session, action: str) -> AlertBulkResponse:
+    """Executa uma operação em lote e resume os resultados por item"""
+    if len(items) > MAX_BULK_ALERTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_ALERTS} alerts per request"
+        )
+    try:
+        results = operation(db, items, current_user.id)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error {action} alerts: {str(e)}"
+        )
+    succeeded = sum(1 for result in results if result["status"] in ("created", "updated", "deleted"))
+    return AlertBulkResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+@router.post("/me/alerts/bulk", response_model=AlertBulkResponse)
+def bulk_create_user_alerts(
+    alerts: list[AlertCreate],
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Cria vários alertas em uma única transação"""
+    return _run_bulk(bulk_create_alerts, alerts, current_user, db, "creating")
+
+@router.put("/me/alerts/bulk", response_model=AlertBulkResponse)
+def bulk_update_user_alerts(
+    updates: list[AlertBulkUpdateItem],
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Atualiza vários alertas em uma única transação"""
+    return _run_bulk(bulk_update_alerts, updates, current_user, db, "updating")
+
+@router.post("/me/alerts/bulk/delete", response_model=AlertBulkResponse)
+def bulk_delete_user_alerts(
+    request: AlertBulkDelete,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Deleta vários alertas em uma única transação"""
+    return _run_bulk(bulk_delete_alerts, request.ids, current_user, db, "deleting")
+
 @router.put("/me/alerts/{alert_id}", response_model=Alert)
 def update_user_alert(
     alert_id: int,
@@ -78,10 +138,20 @@ def test_alert_notification(
             detail="Alert not found"
         )
 
-    # Simula o envio de notificação
-    # No frontend, isso seria chamado para testar as notificações push
+    # Notificação de teste ignora a deduplicação por last_notified
+    title = "🚨 Alerta de Preço!"
+    body = f"O preço para {db_alert.origin} → {db_alert.destination} está abaixo de R$ {db_alert.target_price:.2f}!"
+    delivery_status = dispatcher.notify_alert(db_alert, title, body, dedupe=False)
+    if delivery_status in ("rate_limited", "dropped", "unavailable"):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS if delivery_status == "rate_limited"
+            else status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Notification not sent: {delivery_status}"
+        )
+
     return {
-        "message": f"Test notification sent for alert {alert_id}",
+        "message": f"Test notification queued for alert {alert_id}",
+        "status": delivery_status,
         "alert": {
             "origin": db_alert.origin,
             "destination": db_alert.destination,
@@ -92,9 +162,16 @@ def test_alert_notification(
 # Search history routes
 @router.get("/me/history", response_model=list[SearchHistory])
 def read_user_search_history(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Retorna o histórico de buscas do usuário logado"""
+    """Retorna o histórico de buscas do usuário logado (304 se nada mudou desde o ETag enviado)"""
+    etag = make_etag("history", current_user.id, get_search_history_version(db, current_user.id))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers.update(cache_headers(etag))
     history = get_search_history_by_user(db, current_user.id)
     return history
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
 
 # Schemas para User
@@ -42,6 +42,25 @@ class Alert(AlertBase):
     class Config:
         from_attributes = True
 
+# Schemas para operações em lote de alertas
+class AlertBulkUpdateItem(AlertUpdate):
+    id: int
+
+class AlertBulkDelete(BaseModel):
+    ids: List[int]
+
+class AlertBulkResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str  # "created", "updated", "deleted", "invalid", "not_found", "duplicate"
+    error: Optional[str] = None
+    alert: Optional[Alert] = None
+
+class AlertBulkResponse(BaseModel):
+    results: List[AlertBulkResult]
+    succeeded: int
+    failed: int
+
 # Schemas para SearchHistory
 class SearchHistoryBase(BaseModel):
     origin: str
@@ -64,6 +83,16 @@ class FlightSearchRequest(BaseModel):
     departure_date: str
     round_trip: Optional[bool] = False
     return_date: Optional[str] = None
+    # Origem/destino aceitam códigos de cidade (SAO, RIO); include_nearby_airports expande aeroportos da mesma região
+    include_nearby_airports: Optional[bool] = False
+    # Filtros, ordenação e limite aplicados no servidor
+    max_stops: Optional[int] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    departure_after: Optional[str] = None  # Formato HH:MM
+    departure_before: Optional[str] = None  # Formato HH:MM
+    sort_by: Optional[Literal["price", "duration", "departure_time"]] = None
+    limit: Optional[int] = None
 
 class Flight(BaseModel):
     id: str
@@ -86,6 +115,26 @@ class FlightSearchResponse(BaseModel):
     flights: List[Flight]
     search_id: str
 
+# Schemas para busca com datas flexíveis (calendário)
+class CalendarSearchRequest(BaseModel):
+    origin: str
+    destination: str
+    start_date: str  # Formato YYYY-MM-DD
+    end_date: str  # Formato YYYY-MM-DD, no máximo 60 dias após start_date
+    # Mesmas regras de aeroportos de FlightSearchRequest (códigos de cidade e aeroportos próximos)
+    include_nearby_airports: Optional[bool] = False
+
+class CalendarDay(BaseModel):
+    date: str
+    cheapest_price: float
+    predicted_price: float
+    flights_count: int
+
+class CalendarSearchResponse(BaseModel):
+    days: List[CalendarDay]
+    cheapest_date: str
+    search_id: str
+
 # Schemas para Price Prediction
 class PricePredictionRequest(BaseModel):
     origin: str
@@ -96,6 +145,31 @@ class PricePredictionResponse(BaseModel):
     predicted_price: float
     trend: str  # "up", "down", "stable"
 
+# Schemas para analytics (admin)
+class RouteStats(BaseModel):
+    origin: str
+    destination: str
+    searches: int
+    unique_users: int  # soma dos usuários distintos de cada período da janela
+    avg_results: float
+
+class TopRoutesResponse(BaseModel):
+    granularity: str
+    since: datetime
+    routes: List[RouteStats]
+
+class RouteTimeseriesPoint(BaseModel):
+    bucket_start: datetime
+    searches: int
+    unique_users: int
+    avg_results: float
+
+class RouteTimeseriesResponse(BaseModel):
+    origin: str
+    destination: str
+    granularity: str
+    points: List[RouteTimeseriesPoint]
+
 # Token schemas
 class Token(BaseModel):
     access_token: str
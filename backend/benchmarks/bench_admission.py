@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark do controle de admissão: latência de um usuário bem-comportado enquanto outro
+cliente martela /flights/search, com o middleware desligado e ligado.
+
+Sobe a API com uvicorn em um processo separado (banco SQLite temporário) para cada cenário.
+
+Uso: python benchmarks/bench_admission.py [--abusers 64] [--duration 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEARCH = {"origin": "GRU", "destination": "SDU", "departure_date": "2025-01-01"}
+
+
+def start_server(port: int, admission: bool, db_path: str):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "ADMISSION_ENABLED": "1" if admission else "0",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{base_url}/health", timeout=1)
+            return server, base_url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("Servidor não iniciou")
+
+
+def register(base_url: str, email: str) -> dict:
+    token = requests.post(f"{base_url}/auth/register", json={"email": email, "password": "senha123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def run_scenario(admission: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        server, base_url = start_server(args.port, admission, os.path.join(tmp, "bench.sqlite"))
+        try:
+            good = register(base_url, "good@example.com")
+            abuser = register(base_url, "abuser@example.com")
+            stop = threading.Event()
+            abuse_status = Counter()
+
+            def hammer():
+                session = requests.Session()
+                while not stop.is_set():
+                    try:
+                        abuse_status[session.post(f"{base_url}/flights/search", json=SEARCH, headers=abuser).status_code] += 1
+                    except requests.RequestException:
+                        abuse_status["error"] += 1
+
+            threads = [threading.Thread(target=hammer, daemon=True) for _ in range(args.abusers)]
+            for thread in threads:
+                thread.start()
+
+            # Usuário bem-comportado: uma busca a cada 0,5 s (dentro do limite por usuário)
+            latencies, good_status = [], Counter()
+            session = requests.Session()
+            deadline = time.perf_counter() + args.duration
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                good_status[session.post(f"{base_url}/flights/search", json=SEARCH, headers=good).status_code] += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+                time.sleep(max(0.0, 0.5 - (time.perf_counter() - start)))
+
+            stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(0, int(len(latencies) * 0.95) - 1)],
+        "good": dict(good_status),
+        "abuser": dict(abuse_status),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do controle de admissão")
+    parser.add_argument("--abusers", type=int, default=64, help="threads do cliente abusivo")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos por cenário")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for admission in (False, True):
+        result = run_scenario(admission, args)
+        label = "ligado" if admission else "desligado"
+        print(f"Controle de admissão {label}:")
+        print(f"  usuário bem-comportado: p50 {result['p50']:.1f} ms | p95 {result['p95']:.1f} ms | status {result['good']}")
+        print(f"  cliente abusivo: status {result['abuser']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark de filtro, ordenação e top-k sobre conjuntos grandes de voos, de ponta a ponta por requisição.
+Compara gerar dicionários e consultá-los (parsing de strings a cada consulta) com gerar o array estruturado
+de app/flight_query.py, consultá-lo e montar os dicionários só das linhas retornadas.
+
+Uso: python benchmarks/bench_flight_query.py [--flights 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.crud import flights_to_dicts, generate_mock_flight_table
+from app.flight_query import parse_clock, parse_duration, query_flight_table
+
+PAIRS = [("GRU", "SDU")]
+DEPARTURE_DATE = "2025-01-01"
+SEED = 42
+
+QUERY = {
+    "max_stops": 1,
+    "min_price": 200.0,
+    "max_price": 800.0,
+    "departure_after": parse_clock("08:00"),
+    "departure_before": parse_clock("18:00"),
+    "sort_by": "duration",
+    "limit": 50,
+}
+
+
+def query_dicts(flights):
+    """Consulta equivalente feita diretamente sobre os dicionários"""
+    selected = [
+        f for f in flights
+        if f["stops"] <= QUERY["max_stops"]
+        and QUERY["min_price"] <= f["price"] <= QUERY["max_price"]
+        and QUERY["departure_after"] <= parse_clock(f["departure_time"]) <= QUERY["departure_before"]
+    ]
+    selected.sort(key=lambda f: (parse_duration(f["duration"]), f["price"]))
+    return selected[:QUERY["limit"]]
+
+
+def best_of(repeat, func, *args, **kwargs):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def generate(count):
+    # Mesma semente nos dois caminhos: ambos consultam exatamente os mesmos voos
+    return generate_mock_flight_table(*PAIRS[0], count=count, rng=np.random.default_rng(SEED))
+
+
+def dict_request(count):
+    """Caminho antigo: todos os voos viram dicionários e a consulta é feita sobre eles"""
+    return query_dicts(flights_to_dicts(generate(count), PAIRS, DEPARTURE_DATE))
+
+
+def table_request(count):
+    """Caminho atual: consulta sobre o array e dicionários só para o resultado"""
+    return flights_to_dicts(query_flight_table(generate(count), **QUERY), PAIRS, DEPARTURE_DATE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de consultas sobre voos")
+    parser.add_argument("--flights", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Ponta a ponta: geração + consulta + montagem da resposta
+    dict_total_ms, expected = best_of(args.repeat, dict_request, args.flights)
+    table_total_ms, result = best_of(args.repeat, table_request, args.flights)
+    assert [f["id"] for f in expected] == [f["id"] for f in result]
+
+    # Etapas isoladas
+    generate_ms, table = best_of(args.repeat, generate, args.flights)
+    tracemalloc.start()
+    flights = flights_to_dicts(table, PAIRS, DEPARTURE_DATE)
+    dicts_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    dicts_ms, _ = best_of(args.repeat, query_dicts, flights)
+    table_ms, _ = best_of(args.repeat, query_flight_table, table, **QUERY)
+
+    print(f"Voos: {args.flights:,}")
+    print(f"Memória: dicionários ~{dicts_bytes / 1e6:.1f} MB | array estruturado {table.nbytes / 1e6:.1f} MB")
+    print(f"Requisição com dicionários:     {dict_total_ms:8.1f} ms (geração + dicionários + consulta)")
+    print(f"Requisição com array:           {table_total_ms:8.1f} ms (geração + consulta + dicionários do resultado) "
+          f"-> {dict_total_ms / table_total_ms:.1f}x mais rápida")
+    print(f"  geração do array:             {generate_ms:8.1f} ms")
+    print(f"  consulta sobre dicionários:   {dicts_ms:8.1f} ms")
+    print(f"  consulta sobre o array:       {table_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
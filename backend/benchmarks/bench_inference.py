@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark da inferência de preços: modelo joblib (scikit-learn) x bundle JSON (só NumPy).
+Cada caminho roda em um processo novo para medir tempo de import/carga e RSS do worker,
+e as previsões dos dois caminhos são comparadas (paridade).
+
+Uso: python benchmarks/bench_inference.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado em um processo novo; imprime um JSON com as medições
+PROBE = r"""
+import json, resource, sys, time, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, ".")
+start = time.perf_counter()
+if sys.argv[1] == "joblib":
+    import joblib
+    import numpy as np
+    model = joblib.load("price_predictor.joblib")
+    codes = joblib.load("airport_codes.joblib")
+    predict = lambda features: model.predict(features)
+else:
+    import numpy as np
+    from app.price_model import LinearPriceModel
+    model = LinearPriceModel.load("price_predictor.json")
+    codes = model.airport_codes
+    predict = model.predict_features
+load_ms = (time.perf_counter() - start) * 1000
+
+ids = sorted(set(codes.values()))
+grid = np.array([(o, d, days) for o in ids for d in ids for days in range(1, 91)], dtype=np.float64)
+start = time.perf_counter()
+for _ in range(100):
+    predictions = predict(grid)
+predict_us = (time.perf_counter() - start) / 100 / len(grid) * 1e6
+
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({
+    "load_ms": load_ms, "rss_mb": rss_mb, "predict_us": predict_us,
+    "modules": len(sys.modules), "predictions": predictions.tolist(),
+}))
+"""
+
+
+def probe(mode: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, mode], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    results = {mode: probe(mode) for mode in ("joblib", "bundle")}
+
+    max_diff = max(abs(a - b) for a, b in zip(results["joblib"]["predictions"], results["bundle"]["predictions"]))
+    print(f"Paridade: {len(results['bundle']['predictions'])} previsões, diferença máxima {max_diff:.2e}")
+    for mode, label in (("joblib", "joblib + scikit-learn"), ("bundle", "bundle JSON + NumPy")):
+        r = results[mode]
+        print(f"{label:22s} import+carga {r['load_ms']:7.1f} ms | RSS máx {r['rss_mb']:6.1f} MB | "
+              f"{r['modules']:4d} módulos | {r['predict_us']:.3f} µs/previsão")
+    if max_diff > 1e-6:
+        sys.exit("Bundle diverge do modelo joblib")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark do pipeline de notificações usando o gateway local (sem rede).
+Mede vazão (notificações por segundo) e latência de entrega desde o enfileiramento.
+
+Uso: python benchmarks/bench_notifications.py [--jobs 20000] [--users 2000] [--batch-size 100]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.notifications import NotificationDispatcher, NotificationJob, StubPushGateway
+
+
+async def run(args):
+    gateway = StubPushGateway(latency=args.gateway_latency, failure_rate=args.failure_rate)
+    dispatcher = NotificationDispatcher(
+        gateway,
+        queue_size=args.jobs,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        backoff_base=0.05,
+        user_rate_per_minute=args.jobs,
+    )
+    await dispatcher.start()
+
+    start = time.perf_counter()
+    for i in range(args.jobs):
+        dispatcher.enqueue(NotificationJob(
+            user_id=i % args.users,
+            alert_id=i,
+            title="Alerta de Preço",
+            body=f"Alerta {i}",
+        ))
+        # Cede o loop periodicamente, como faria um produtor real
+        if i % 500 == 0:
+            await asyncio.sleep(0)
+    await dispatcher.stop()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted((delivered_at - job.enqueued_at) * 1000 for job, delivered_at in gateway.delivered)
+    print(f"Jobs: {args.jobs} | lote: {args.batch_size} | workers: {args.workers} | latência do gateway: {args.gateway_latency * 1000:.0f} ms")
+    print(f"Entregues: {dispatcher.stats['delivered']} | falhas: {dispatcher.stats['failed']} | retentativas: {dispatcher.stats['retried']}")
+    print(f"Vazão: {dispatcher.stats['delivered'] / elapsed:,.0f} notificações/s ({elapsed:.2f} s)")
+    if latencies:
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"Latência de entrega: p50 {statistics.median(latencies):.1f} ms | p95 {p95:.1f} ms | máx {latencies[-1]:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do dispatcher de notificações")
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--gateway-latency", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Recalcula os rollups de analytics (route_search_rollups) a partir de todo o search_history, um dia por vez.
+Apaga os rollups atuais antes de recalcular; rode com a API parada (ou sem buscas novas)
+para que buscas feitas durante o backfill não sejam contadas em dobro.
+
+Uso: python scripts/backfill_analytics.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal, engine, Base
+from app.analytics import backfill_rollups
+from app.models import SearchHistory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill dos rollups de analytics")
+    parser.parse_args()
+
+    # Garante que as tabelas de rollup (e o índice por search_date) existem em bancos criados antes delas
+    Base.metadata.create_all(bind=engine)
+    for index in SearchHistory.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        processed = backfill_rollups(db)
+        elapsed = time.perf_counter() - start
+        print(f"✅ {processed} buscas agregadas em {elapsed:.1f} s ({processed / max(elapsed, 1e-9):,.0f} linhas/s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Popula o banco com volume de produção (usuários, alertas e histórico de buscas) para testes de escala.
+Não interativo: tudo é parametrizado pela linha de comando. Os inserts são feitos em lote
+(INSERT ... executemany) dentro de transações grandes, e a senha é hasheada uma única vez.
+
+Uso:
+    python scripts/seed_database.py --users 100000 --alerts-per-user 3 --searches-per-day 0.5 --days 90
+    DATABASE_URL=sqlite:///./scale.sqlite python scripts/seed_database.py --users 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import insert
+
+# Adicionar o diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal, engine, Base
+from app.models import User, Alert, SearchHistory
+from app.crud import BRAZIL_AIRPORTS, get_password_hash
+from app.analytics import backfill_rollups
+
+
+def route_distribution(rng: np.random.Generator, skew: float):
+    """Todas as rotas entre aeroportos brasileiros com pesos Zipf (skew=0 é uniforme)"""
+    airports = sorted(BRAZIL_AIRPORTS)
+    routes = np.array([(o, d) for o in airports for d in airports if o != d])
+    rng.shuffle(routes)
+    weights = 1.0 / np.arange(1, len(routes) + 1) ** skew
+    return routes, weights / weights.sum()
+
+
+class Progress:
+    """Contabiliza linhas inseridas por tabela e a taxa (linhas/s)"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.rows = {}
+
+    def add(self, table: str, count: int):
+        self.rows[table] = self.rows.get(table, 0) + count
+        elapsed = time.perf_counter() - self.start
+        total = sum(self.rows.values())
+        print(f"\r   {table}: {self.rows[table]:,} linhas | total {total:,} ({total / elapsed:,.0f} linhas/s)", end="", flush=True)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        print()
+        for table, count in self.rows.items():
+            print(f"   - {table}: {count:,}")
+        total = sum(self.rows.values())
+        print(f"✅ {total:,} linhas em {elapsed:.1f} s ({total / elapsed:,.0f} linhas/s)")
+
+
+def seed_users(db, args, hashed_password: str, progress: Progress) -> np.ndarray:
+    """Insere os usuários em lotes e devolve os ids gerados"""
+    ids = []
+    for offset in range(0, args.users, args.batch_size):
+        count = min(args.batch_size, args.users - offset)
+        rows = [
+            {"email": f"{args.email_prefix}{offset + i}@example.com", "hashed_password": hashed_password, "is_active": True}
+            for i in range(count)
+        ]
+        ids.extend(db.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), rows))
+        db.commit()
+        progress.add("users", count)
+    return np.array(ids)
+
+
+def seed_alerts(db, args, rng, user_ids, routes, route_weights, progress: Progress):
+    """Insere alertas com quantidade por usuário ~ Poisson(alerts_per_user)"""
+    counts = rng.poisson(args.alerts_per_user, size=len(user_ids))
+    owners = np.repeat(user_ids, counts)
+    total = len(owners)
+    for offset in range(0, total, args.batch_size):
+        batch_owners = owners[offset:offset + args.batch_size]
+        chosen = routes[rng.choice(len(routes), size=len(batch_owners), p=route_weights)]
+        prices = np.round(np.maximum(100, rng.normal(450, 150, size=len(batch_owners))), 2)
+        active = rng.random(len(batch_owners)) < 0.85
+        rows = [
+            {"user_id": int(u), "origin": o, "destination": d, "target_price": float(p), "is_active": bool(a)}
+            for u, (o, d), p, a in zip(batch_owners, chosen, prices, active)
+        ]
+        db.execute(insert(Alert), rows)
+        db.commit()
+        progress.add("alerts", len(rows))
+
+
+def seed_search_history(db, args, rng, user_ids, routes, route_weights, progress: Progress):
+    """Insere buscas com quantidade por usuário ~ Poisson(searches_per_day * days), espalhadas na janela"""
+    counts = rng.poisson(args.searches_per_day * args.days, size=len(user_ids))
+    owners = np.repeat(user_ids, counts)
+    rng.shuffle(owners)
+    total = len(owners)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    window_seconds = args.days * 86400
+    for offset in range(0, total, args.batch_size):
+        batch_owners = owners[offset:offset + args.batch_size]
+        size = len(batch_owners)
+        chosen = routes[rng.choice(len(routes), size=size, p=route_weights)]
+        ages = rng.integers(0, window_seconds, size=size)
+        days_ahead = rng.integers(1, 91, size=size)
+        results = rng.integers(5, 11, size=size)
+        rows = []
+        for u, (o, d), age, ahead, r in zip(batch_owners, chosen, ages, days_ahead, results):
+            search_date = now - timedelta(seconds=int(age))
+            rows.append({
+                "user_id": int(u),
+                "origin": o,
+                "destination": d,
+                "departure_date": (search_date + timedelta(days=int(ahead))).strftime("%Y-%m-%d"),
+                "search_date": search_date,
+                "results_count": int(r),
+            })
+        db.execute(insert(SearchHistory), rows)
+        db.commit()
+        progress.add("search_history", size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed de alto volume do banco para testes de escala")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--alerts-per-user", type=float, default=3.0, help="média (Poisson) de alertas por usuário")
+    parser.add_argument("--searches-per-day", type=float, default=0.5, help="média de buscas por usuário por dia")
+    parser.add_argument("--days", type=int, default=30, help="janela do histórico de buscas, em dias")
+    parser.add_argument("--route-skew", type=float, default=1.1, help="expoente Zipf da popularidade das rotas (0 = uniforme)")
+    parser.add_argument("--batch-size", type=int, default=50000, help="linhas por INSERT/commit")
+    parser.add_argument("--email-prefix", default="seed", help="prefixo dos emails (use outro para rodar de novo no mesmo banco)")
+    parser.add_argument("--password", default="senha123", help="senha de todos os usuários gerados")
+    parser.add_argument("--skip-rollups", action="store_true", help="não recalcula os rollups ao final (rode scripts/backfill_analytics.py depois)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    rng = np.random.default_rng(args.seed)
+    routes, route_weights = route_distribution(rng, args.route_skew)
+
+    print("🚀 Populando banco de dados...")
+    # bcrypt é caro de propósito: um único hash reaproveitado por todos os usuários
+    hashed_password = get_password_hash(args.password)
+    progress = Progress()
+    db = SessionLocal()
+    try:
+        user_ids = seed_users(db, args, hashed_password, progress)
+        seed_alerts(db, args, rng, user_ids, routes, route_weights, progress)
+        seed_search_history(db, args, rng, user_ids, routes, route_weights, progress)
+        progress.summary()
+        if not args.skip_rollups:
+            # Histórico espalhado na janela: os rollups são recalculados de uma vez, um dia por vez
+            start = time.perf_counter()
+            processed = backfill_rollups(db)
+            print(f"✅ rollups de analytics de {processed:,} buscas em {time.perf_counter() - start:.1f} s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()